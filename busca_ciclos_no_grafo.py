@@ -7,24 +7,301 @@ Busca, por meio da implementacao do Algoritmo de Johnson com a biblioteca igraph
 Autor: Rogers Reiche de Mendonça <rogers.rj@gmail.com>
 Data: Outubro/2021
 """
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import csv
+from queue import SimpleQueue
+import struct
 import sys
 import time
 
 import igraph as ig
 
-from common.logging import log
+from common.logging import flush_logs, log, log_raw
 
 # Constante com o numero minimo de vertices de um SCC (Strong Connected Components) considerado pelo Algoritmo de
 # Johnson. Ao utilizar MIN_SCC_SIZE = 2, desconsidera-se os ciclos de 1 vertice (ou seja, autorrelacionamentos).
 MIN_SCC_SIZE = 2
 
+# Constante com o intervalo (em numero de vertices processados) entre os logs de progresso da busca, quando ela nao e
+# executada em modo verbose (no qual o progresso e registrado a cada vertice processado).
+PROGRESS_LOG_INTERVAL = 10 ** 4
+
+# Constante com o numero minimo de vertices de um SCC para que ele seja enviado a um processo na busca em paralelo. Os
+# SCCs menores (a maioria nos grafos reais) sao buscados no proprio processo, pois custa mais envia-los a outro processo
+# do que busca-los.
+PARALLEL_MIN_SCC_SIZE = 100
+
+# Constante com a extensao do arquivo de saida para a qual os ciclos sao gravados em formato binario: cada ciclo e um
+# registro com o numero de vertices seguido dos ids dos vertices, todos inteiros de 32 bits little-endian.
+BINARY_CYCLES_EXTENSION = '.bin'
+
+
+def _unblock(thisnode, blocked, B):
+    stack = [thisnode]
+    while stack:
+        node = stack.pop()
+        if blocked[node]:
+            blocked[node] = 0
+            stack.extend(B[node])
+            B[node].clear()
+
+
+def _get_neighbors(adj, in_scc, node):
+    return [w for w in adj[node] if in_scc[w]]
+
+
+def _johnson_circuits(adj, in_scc, blocked, closed, B, touched, startnode, limited_by_id, limit_len):
+    """
+        "circuit" routine of Johnson's algorithm: produces the elementary cycles through startnode.
+
+        Works only on integer vertex indexes (adjacency lists and in_scc mask of the startnode's strongly connected
+        component), without igraph objects, so it is the single hot loop of the search. The blocked and closed
+        bitsets (bytearrays indexed by vertex) and the B lists are shared between calls and left cleared on return;
+        touched (bytearray) flags the nodes whose entries must be cleared, so each node is recorded once.
+        limited_by_id flags the nodes counted in the limit length (all of them when no node type is limited).
+    """
+    get_neighbors = _get_neighbors
+    if limit_len < 0:
+        limit_len = len(adj)  # unlimited: a path never has more nodes than the graph
+    # Processing node runs "circuit" routine from recursive version
+    path = [startnode]
+    path_count = limited_by_id[startnode]  # count of path nodes counted in the limit length
+    touched_nodes = [startnode]  # nodes whose blocked/closed flags and B lists must be cleared at the end (once each)
+    touched[startnode] = 1
+    closed_len = 0  # path[:closed_len] is already marked as closed (path nodes stay closed until popped)
+    blocked[startnode] = 1
+    stack = [(startnode, get_neighbors(adj, in_scc, startnode))]  # in_scc nodes give comp nbrs
+    while stack:
+        thisnode, nbrs = stack[-1]
+        in_limit = path_count <= limit_len
+        if nbrs and in_limit:
+            nextnode = nbrs.pop()
+            if nextnode == startnode:
+                yield path[:]
+                for k in range(closed_len, len(path)):
+                    closed[path[k]] = 1
+                closed_len = len(path)
+            elif not blocked[nextnode]:
+                path.append(nextnode)
+                path_count += limited_by_id[nextnode]
+                if not touched[nextnode]:
+                    touched[nextnode] = 1
+                    touched_nodes.append(nextnode)
+                stack.append((nextnode, get_neighbors(adj, in_scc, nextnode)))
+                closed[nextnode] = 0
+                blocked[nextnode] = 1
+                continue
+        # done with nextnode... look for more neighbors
+        if (not nbrs) or (not in_limit):
+            if not in_limit:
+                # search cut by the limit: the path nodes may still be in cycles, so they must not stay blocked
+                for k in range(closed_len, len(path)):
+                    closed[path[k]] = 1
+                closed_len = len(path)
+            if closed[thisnode]:
+                _unblock(thisnode, blocked, B)
+            else:
+                for nbr in get_neighbors(adj, in_scc, thisnode):
+                    B_nbr = B[nbr]
+                    if thisnode not in B_nbr:
+                        if not touched[nbr]:
+                            touched[nbr] = 1
+                            touched_nodes.append(nbr)
+                        B_nbr.append(thisnode)
+            stack.pop()
+            path_count -= limited_by_id[path.pop()]
+            if closed_len > len(path):
+                closed_len = len(path)
+    for node in touched_nodes:
+        blocked[node] = 0
+        closed[node] = 0
+        touched[node] = 0
+        B[node].clear()
+
+
+def _small_scc_circuits(adj, startnode, others, limited_by_id, limit_len):
+    """
+        Produces the elementary cycles through startnode of a strongly connected component with at most 3 nodes
+        (startnode and the others), enumerating them directly instead of running _johnson_circuits.
+
+        The cycles are the same Johnson's search would produce, repeated as many times as the parallel edges
+        combine (the search follows every edge).
+    """
+    if limit_len < 0:
+        limit_len = len(adj)
+    nbrs = adj[startnode]
+    count = limited_by_id[startnode]
+    if count > limit_len:
+        return
+    for _ in range(nbrs.count(startnode)):  # self-loops
+        yield [startnode]
+    for a in others:
+        count_a = count + limited_by_id[a]
+        edges_a = nbrs.count(a)
+        if count_a > limit_len or not edges_a:
+            continue
+        for _ in range(edges_a * adj[a].count(startnode)):
+            yield [startnode, a]
+        for b in others:
+            if b != a and count_a + limited_by_id[b] <= limit_len:
+                for _ in range(edges_a * adj[a].count(b) * adj[b].count(startnode)):
+                    yield [startnode, a, b]
+
+
+def _strongly_connected_components(adj, active, nodes, state, index, lowlink, min_scc_size: int = 1):
+    """
+        Nonrecursive Tarjan's algorithm over the active vertices of nodes.
+
+        state (bytearray), index and lowlink are workspaces indexed by vertex, shared between calls.
+        state is 1 for a node of nodes not yet visited, 2 while it is on the Tarjan stack and 0 otherwise
+        (so it is left cleared on return), which also makes the search ignore the edges leaving nodes.
+    """
+    for node in nodes:
+        if active[node]:
+            state[node] = 1
+    scc_stack = []
+    scc_list = []  # list of list
+    counter = 0
+    for root in nodes:
+        if state[root] != 1:
+            continue
+        state[root] = 2
+        index[root] = lowlink[root] = counter
+        counter += 1
+        scc_stack.append(root)
+        work = [(root, iter(adj[root]))]
+        while work:
+            v, nbrs = work[-1]
+            for w in nbrs:
+                w_state = state[w]
+                if w_state == 1:
+                    state[w] = 2
+                    index[w] = lowlink[w] = counter
+                    counter += 1
+                    scc_stack.append(w)
+                    work.append((w, iter(adj[w])))
+                    break
+                elif w_state == 2 and index[w] < lowlink[v]:
+                    lowlink[v] = index[w]
+            else:
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if lowlink[v] < lowlink[u]:
+                        lowlink[u] = lowlink[v]
+                if lowlink[v] == index[v]:
+                    scc = []
+                    while True:
+                        w = scc_stack.pop()
+                        state[w] = 0
+                        scc.append(w)
+                        if w == v:
+                            break
+                    if len(scc) >= min_scc_size:
+                        scc_list.append(scc)
+    return scc_list
+
+
+def _split_sccs(sccs, submit):
+    """
+        Calls submit with each component of sccs with at least PARALLEL_MIN_SCC_SIZE nodes, except the largest one
+        (so that the caller keeps splitting it), and returns the other components.
+    """
+    largest = max(sccs, key=len, default=None)
+    local_sccs = []
+    for scc in sccs:
+        if scc is not largest and len(scc) >= PARALLEL_MIN_SCC_SIZE:
+            submit(scc)
+        else:
+            local_sccs.append(scc)
+    return local_sccs
+
+
+def _johnson_cycles(adj, active, sccs, limited_by_id, limit_len,
+                    log_file: str = None, verbose: bool = False, on_pivot=None, submit=None, drain=None):
+    """
+        Johnson's algorithm over the stack of strongly connected components sccs (lists of active vertex indexes).
+
+        Produces the elementary cycles of the components, deactivating the processed nodes. If given, on_pivot is
+        called after each processed node with the list of nodes deactivated. If given, submit is called (see
+        _split_sccs) with the big components, initial or left after a node is processed, that are searched elsewhere
+        (their nodes stay active), and the cycles produced by drain() are produced after each processed node.
+    """
+    n = len(adj)
+    blocked = bytearray(n)  # vertex: blocked from search?
+    closed = bytearray(n)  # nodes involved in a cycle
+    B = [[] for _ in range(n)]  # graph portions that yield no elementary circuit
+    touched = bytearray(n)  # nodes with entries to clear in blocked, closed and B
+    in_scc = bytearray(n)  # nodes of the component being searched
+    scc_state = bytearray(n)  # workspaces of _strongly_connected_components
+    scc_index = [0] * n
+    scc_lowlink = [0] * n
+    if submit is not None:
+        sccs = _split_sccs(sccs, submit)
+    i = 0
+    while sccs:
+        i += 1
+        scc = sccs.pop()
+
+        # order of scc determines ordering of nodes
+        startnode = scc.pop()
+        if len(scc) < 3:
+            # tiny components (the majority in real graphs) don't need the DFS bookkeeping
+            circuits = _small_scc_circuits(adj, startnode, scc, limited_by_id, limit_len)
+        else:
+            # The search must not leave the component: no cycle goes through the other active nodes, and once the
+            # length limit cuts a path (unblocking it) the search would enumerate every bounded path through them.
+            in_scc[startnode] = 1
+            for node in scc:
+                in_scc[node] = 1
+            circuits = _johnson_circuits(adj, in_scc, blocked, closed, B, touched, startnode, limited_by_id, limit_len)
+        for cycle in circuits:
+            if verbose:
+                log_raw(f"{i}. cycle = {cycle}", log_file=log_file)
+            yield cycle
+        if in_scc[startnode]:
+            in_scc[startnode] = 0
+            for node in scc:
+                in_scc[node] = 0
+        # done processing this node
+        active[startnode] = 0
+        deactivated = [startnode]
+
+        scc_extend_list = _strongly_connected_components(adj, active, scc, scc_state, scc_index, scc_lowlink)
+        if submit is not None:
+            scc_extend_list = _split_sccs(scc_extend_list, submit)
+
+        for scc_ext in scc_extend_list:
+            if len(scc_ext) >= MIN_SCC_SIZE:
+                sccs.append(scc_ext)
+            else:
+                for node in scc_ext:
+                    active[node] = 0
+                    deactivated.append(node)
+
+        if on_pivot is not None:
+            on_pivot(deactivated)
+        if drain is not None:
+            yield from drain()
+
+
+def _scc_cycles(adj, limited_by_id, limit_len):
+    """
+        Process pool task: returns all the elementary cycles of a strongly connected component.
+
+        adj holds the out-neighbors of the component nodes relabeled to 0..n-1 (edges leaving the component removed)
+        and limited_by_id flags the ones counted in the cycle limit length.
+    """
+    active = bytearray(b'\x01') * len(adj)
+    return list(_johnson_cycles(adj, active, [list(range(len(adj)))], limited_by_id, limit_len))
+
 
 def simple_cycles_ig(G: ig.Graph,
                      limit_len: int = -1,
                      limit_node_type: str = None,
-                     log_file: str = None):
+                     log_file: str = None,
+                     verbose: bool = False,
+                     workers: int = 1):
     """
         Rewrite of simple_cycles function from the networkx library to igraph library.
 
@@ -41,6 +318,17 @@ def simple_cycles_ig(G: ig.Graph,
            Node type to consider in cycle limit length. If None (default), consider all node types.
         log_file : string
            Log file path.
+        verbose : bool
+           If True, log every cycle found and the progress after every processed node.
+           If False (default), log only the progress every PROGRESS_LOG_INTERVAL processed nodes.
+        workers : int
+           Number of processes searching the strongly connected components in parallel. If 1 (default), the search
+           runs in the calling process and cycles are produced as they are found; otherwise the components with at
+           least PARALLEL_MIN_SCC_SIZE nodes, initial or left after each processed node (but the largest one, which
+           keeps being split in the calling process), are searched by the workers and all the cycles of each one are
+           produced when its search is done (the order of the cycles is not deterministic). Each worker returns all
+           the cycles of a component at once, so they are held in memory (in the worker and then in the calling
+           process) until they are produced.
 
         Returns
         -------
@@ -60,38 +348,32 @@ def simple_cycles_ig(G: ig.Graph,
            v. 16, no. 2, 192-204, 1976.
     """
 
-    def _unblock(thisnode, blocked, B):
-        stack = {thisnode}
-        while stack:
-            node = stack.pop()
-            if node in blocked:
-                blocked.remove(node)
-                stack.update(B[node])
-                B[node].clear()
-
-    def _get_neighbors(subG, node_id):
-        return [subG.vs[i]['id']
-                for i in subG.neighbors(subG.vs.find(id=node_id), mode='out')]
-
-    def _strongly_connected_components(subG: ig.Graph, min_scc_size: int = 1):
-        scc_list = list(subG.components(mode='STRONG'))  # list of list
-        scc_list_obj_id = [subG.vs[scc]['id'] for scc in scc_list if
-                           len(scc) >= min_scc_size]  # list of list
-        return [set(frozenset(scc)) for scc in scc_list_obj_id]  # list of set
-
-    def is_path_in_limit(subG, path, limit_len, limit_node_type):
-        if limit_len < 0:
-            return True
-        elif limit_node_type is None:
-            return len(path) <= limit_len
-        else:
-            node_type_count = 0
-            for node_id in path:
-                if subG.vs.find(id=node_id)['tipo'] == limit_node_type:
-                    node_type_count += 1
-                    if node_type_count > limit_len:
-                        return False
-            return True
+    def _removed_edges(adj, active, in_degree, nodes):
+        # count of edges "deleted" from the graph with the (already deactivated) nodes;
+        # in_degree holds the count of in-edges of each node coming from nodes not yet deleted
+        pending = set(nodes)
+        count = 0
+        for node in nodes:
+            pending.discard(node)
+            count += in_degree[node]
+            for w in adj[node]:
+                if w != node and (active[w] or w in pending):
+                    in_degree[w] -= 1
+                    count += 1
+        return count
+
+    def _log_progress(deactivated):
+        nonlocal step, remaining_vs, remaining_es
+        step += 1
+        remaining_vs -= len(deactivated)
+        remaining_es -= _removed_edges(adj, active, in_degree, deactivated)
+        if verbose or step % PROGRESS_LOG_INTERVAL == 0:
+            # only the interval lines are timestamped: the verbose lines (one per processed node) skip the formatting
+            write = log if step % PROGRESS_LOG_INTERVAL == 0 else log_raw
+            write(f"{step}. subgraph ("
+                  f"{remaining_vs}/{total_vs} vertices [{(1 - (remaining_vs / total_vs)) * 100:.2f}% processed], "
+                  f"{remaining_es}/{total_es} edges [{(1 - (remaining_es / total_es)) * 100:.2f}% processed]"
+                  f")", log_file=log_file)
 
     if not (isinstance(G, ig.Graph) and G.is_directed()):
         raise Exception('[simple_cycles_ig] G parameter '
@@ -106,93 +388,132 @@ def simple_cycles_ig(G: ig.Graph,
     # Johnson's algorithm requires some ordering of the nodes.
     # We assign the arbitrary ordering given by the strongly connected comps
     # There is no need to track the ordering as each node removed as processed.
-    # Also we save the actual graph so we can mutate it. We only take the
-    # edges because we do not want to copy edge and node attributes here.
-    subG = G.copy()
-    subG.vs['id'] = [v.index for v in subG.vs]
-    total_vs = len(subG.vs)
-    total_es = len(subG.es)
-    # sccs = _strongly_connected_components(subG)
-    sccs = _strongly_connected_components(subG=subG, min_scc_size=MIN_SCC_SIZE)
-    i = 0
-    while sccs:
-        i += 1
-        scc = sccs.pop()
+    # Instead of copying and mutating the graph, we only take its adjacency
+    # list once (read-only) and "delete" the processed nodes by clearing them
+    # in the active mask. Nodes are identified by their vertex index in G.
+    adj = G.get_adjlist(mode='out')
+    if MIN_SCC_SIZE >= 2:
+        # The cycles of 1 vertex are disregarded, so the self-loops are removed (otherwise they would be reported
+        # only for the nodes that happen to be processed while their component still has other nodes).
+        for node, nbrs in enumerate(adj):
+            if node in nbrs:
+                adj[node] = [w for w in nbrs if w != node]
+    in_degree = G.indegree()  # only for the count of remaining edges in the progress log
+    active = bytearray(b'\x01') * len(G.vs)  # vertex: still in the graph?
+    # The node types are compared only once: the search just needs to know which nodes count in the limit length
+    if limit_len >= 0 and limit_node_type is not None:
+        limited_by_id = bytearray(tipo == limit_node_type for tipo in G.vs['tipo'])
+    else:
+        limited_by_id = bytearray(b'\x01') * len(G.vs)
+    total_vs = remaining_vs = len(G.vs)
+    total_es = remaining_es = len(G.es)
+    step = 0  # count of progress steps (processed nodes, or components searched by the workers)
+    sccs = _strongly_connected_components(adj, active, range(total_vs), bytearray(total_vs), [0] * total_vs,
+                                          [0] * total_vs, min_scc_size=MIN_SCC_SIZE)
+    if workers <= 1:
+        yield from _johnson_cycles(adj, active, sccs, limited_by_id, limit_len,
+                                   log_file=log_file, verbose=verbose, on_pivot=_log_progress)
+        return
+
+    # The components left after each processed node are vertex-disjoint, so each big one is searched by a worker on
+    # its own relabeled subgraph, while the largest one keeps being split here (see _split_sccs) with the small ones.
+    def _submit(scc):
+        nodes = sorted(scc)
+        position = {node: k for k, node in enumerate(nodes)}
+        scc_adj = [[position[w] for w in adj[node] if w in position] for node in nodes]
+        scc_limited = bytes(limited_by_id[node] for node in nodes)
+        future = executor.submit(_scc_cycles, scc_adj, scc_limited, limit_len)
+        futures[future] = nodes
+        future.add_done_callback(done.put)
+
+    def _worker_cycles(future):
+        nodes = futures.pop(future)  # the future holds all the cycles of the component: don't keep it
+        for cycle in future.result():
+            cycle = [nodes[k] for k in cycle]
+            if verbose:
+                log_raw(f"{step + 1}. cycle = {cycle}", log_file=log_file)
+            yield cycle
+        for node in nodes:
+            active[node] = 0
+        _log_progress(nodes)
+
+    def _drain():
+        while not done.empty():
+            yield from _worker_cycles(done.get())
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    futures = {}  # pending future: nodes of its component
+    done = SimpleQueue()  # futures finished and not yet drained
+    try:
+        yield from _johnson_cycles(adj, active, sccs, limited_by_id, limit_len, log_file=log_file, verbose=verbose,
+                                   on_pivot=_log_progress, submit=_submit, drain=_drain)
+        while futures:
+            yield from _worker_cycles(done.get())
+    finally:
+        executor.shutdown(cancel_futures=True)
 
-        # order of scc determines ordering of nodes
-        startnode = scc.pop()
-        # Processing node runs "circuit" routine from recursive version
-        path = [startnode]
-        blocked = set()  # vertex: blocked from search?
-        closed = set()  # nodes involved in a cycle
-        blocked.add(startnode)
-        B = defaultdict(set)  # graph portions that yield no elementary circuit
-        stack = [(startnode, _get_neighbors(subG, startnode))]  # subG gives comp nbrs
-        while stack:
-            thisnode, nbrs = stack[-1]
-            if nbrs and is_path_in_limit(subG, path, limit_len, limit_node_type):
-                nextnode = nbrs.pop()
-                if nextnode == startnode:
-                    log(f"{i}. cycle = {path[:]}", log_file=log_file)
-                    yield path[:]
-                    closed.update(path)
-                elif nextnode not in blocked:
-                    path.append(nextnode)
-                    stack.append((nextnode, _get_neighbors(subG, nextnode)))
-                    closed.discard(nextnode)
-                    blocked.add(nextnode)
-                    continue
-            # done with nextnode... look for more neighbors
-            if (not nbrs) or (not is_path_in_limit(subG, path, limit_len, limit_node_type)):
-                if thisnode in closed:
-                    _unblock(thisnode, blocked, B)
-                else:
-                    for nbr in _get_neighbors(subG, thisnode):
-                        if thisnode not in B[nbr]:
-                            B[nbr].add(thisnode)
-                stack.pop()
-                path.pop()
-        # done processing this node
-        subG.delete_vertices(subG.vs.find(id=startnode).index)
 
-        scc_subG_id = [subG.vs.find(id=node_id).index for node_id in scc]
-        H = subG.subgraph(scc_subG_id)
-        scc_extend_list = _strongly_connected_components(H)
+def _write_binary_cycle(fd, cycle):
+    fd.write(struct.pack(f'<{len(cycle) + 1}i', len(cycle), *cycle))
 
-        for scc_ext in scc_extend_list:
-            if len(scc_ext) >= MIN_SCC_SIZE:
-                sccs.extend([scc_ext])
-            else:
-                subG.delete_vertices([subG.vs.find(id=node_id).index for node_id in scc_ext])
 
-        log(f"{i}. subgraph ("
-            f"{len(subG.vs)}/{total_vs} vertices [{(1 - (len(subG.vs) / total_vs)) * 100:.2f}% processed], "
-            f"{len(subG.es)}/{total_es} edges [{(1 - (len(subG.es) / total_es)) * 100:.2f}% processed]"
-            f")", log_file=log_file)
+def read_binary_cycles(bin_cycles_input: str):
+    """
+        Reads the cycles saved by search_cycles in binary format (output file with BINARY_CYCLES_EXTENSION).
+
+        Returns a generator of cycles, each one a list of vertex ids.
+    """
+    with open(bin_cycles_input, 'rb') as fd:
+        while True:
+            header = fd.read(4)
+            if not header:
+                return
+            if len(header) < 4:
+                raise Exception('[read_binary_cycles] Truncated cycle header')
+            n = struct.unpack('<i', header)[0]
+            data = fd.read(4 * n)
+            if len(data) < 4 * n:
+                raise Exception(f'[read_binary_cycles] Truncated cycle: expected {n} vertex ids')
+            yield list(struct.unpack(f'<{n}i', data))
 
 
 def search_cycles(csv_edges_input: str,
                   txt_cycles_output: str,
                   cycle_limit_len: int,
                   cycle_limit_node_type: str,
-                  log_file: str):
-    # Create graph
-    csv_edges = open(csv_edges_input, mode='r', encoding='utf-8-sig')
-    dict_edges = csv.DictReader(csv_edges, delimiter=';', quoting=csv.QUOTE_NONE)
-    graph = ig.Graph.DictList(vertices=None, edges=dict_edges, directed=True)
+                  log_file: str,
+                  verbose: bool = False,
+                  workers: int = 1):
+    # Create graph (vertices are numbered in order of first appearance, as in igraph.Graph.DictList)
+    vertex_index = {}  # name -> vertex index
+    with open(csv_edges_input, mode='r', encoding='utf-8-sig', newline='') as csv_edges:
+        rows = csv.reader(csv_edges, delimiter=';', quoting=csv.QUOTE_NONE)
+        header = next(rows)
+        source, target = header.index('source'), header.index('target')
+        edges = [(vertex_index.setdefault(row[source], len(vertex_index)),
+                  vertex_index.setdefault(row[target], len(vertex_index)))
+                 for row in rows if row]
+    graph = ig.Graph(n=len(vertex_index), edges=edges, directed=True)
+    graph.vs['name'] = list(vertex_index)
     graph.vs['tipo'] = [name.split('-')[0] for name in graph.vs['name']]
     log(f"grafo criado ({len(graph.vs)} vertices, {len(graph.es)} edges)", log_file=log_file)
 
     # Get cycles
     try:
         i = 0
-        for cycle in simple_cycles_ig(graph,
-                                      cycle_limit_len,
-                                      cycle_limit_node_type,
-                                      log_file):
-            i += 1
-            with open(txt_cycles_output, 'a') as fd:
-                print(cycle, file=fd)
+        binary = txt_cycles_output.endswith(BINARY_CYCLES_EXTENSION)
+        with open(txt_cycles_output, 'ab' if binary else 'a', buffering=1 << 20) as fd:
+            for cycle in simple_cycles_ig(graph,
+                                          cycle_limit_len,
+                                          cycle_limit_node_type,
+                                          log_file,
+                                          verbose,
+                                          workers):
+                i += 1
+                if binary:
+                    _write_binary_cycle(fd, cycle)
+                else:
+                    fd.write(f"{cycle}\n")
         log(f"TOTAL = {i} cycles", log_file=log_file)
     except Exception as e:
         log(f"\nException:\n {e} \n", log_file=log_file)
@@ -200,20 +521,27 @@ def search_cycles(csv_edges_input: str,
 
 def help():
     print('''
-        Uso: python -m busca_ciclos_no_grafo <csv_edges_input> <txt_cycles_output> [<cycle_limit_length> <cycle_limit_node_type>]
+        Uso: python -m busca_ciclos_no_grafo <csv_edges_input> <txt_cycles_output> [<cycle_limit_length> <cycle_limit_node_type>] [--workers=<n>] [--verbose]
         Exemplo: python -m busca_ciclos_no_grafo ./edges.csv ./cycles.txt 8
+        Exemplo: python -m busca_ciclos_no_grafo ./edges.csv ./cycles.txt 8 --workers=4
     ''')
 
 
 def main():
-    if len(sys.argv) < 3:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = [arg for arg in sys.argv[1:] if arg.startswith('--')]
+    verbose = '--verbose' in options
+    workers = [option[len('--workers='):] for option in options if option.startswith('--workers=')]
+    unknown_options = [option for option in options if option != '--verbose' and not option.startswith('--workers=')]
+    if len(args) < 2 or unknown_options or not all(worker.isdigit() and int(worker) >= 1 for worker in workers):
         help()
         sys.exit(-1)
     else:
-        csv_input_edges = sys.argv[1]
-        txt_output_cycles = sys.argv[2]
-        cycle_limit_len = sys.argv[3] if len(sys.argv) >= 4 else -1
-        cycle_limit_node_type = sys.argv[4] if len(sys.argv) >= 5 else None
+        csv_input_edges = args[0]
+        txt_output_cycles = args[1]
+        cycle_limit_len = args[2] if len(args) >= 3 else -1
+        cycle_limit_node_type = args[3] if len(args) >= 4 else None
+        cycle_workers = int(workers[-1]) if workers else 1
 
         log_file = f"{txt_output_cycles}.log"
 
@@ -222,9 +550,12 @@ def main():
         log(f"txt_output_cycles: {txt_output_cycles}", log_file=log_file)
         log(f"cycle_limit_len: {cycle_limit_len}", log_file=log_file)
         log(f"cycle_limit_node_type: {cycle_limit_node_type}", log_file=log_file)
+        log(f"workers: {cycle_workers}", log_file=log_file)
+        log(f"verbose: {verbose}", log_file=log_file)
 
         start = time.time()
-        search_cycles(csv_input_edges, txt_output_cycles, cycle_limit_len, cycle_limit_node_type, log_file)
+        search_cycles(csv_input_edges, txt_output_cycles, cycle_limit_len, cycle_limit_node_type, log_file,
+                      verbose, cycle_workers)
         end = time.time()
 
         delta = end - start
@@ -235,6 +566,7 @@ def main():
         log(f"Tempo de execucao: {delta} "
             f"({int(hours):02}:{int(mins):02}:{int(secs):02}.{str(secs - int(secs)).split('.')[1]})",
             log_file=log_file)
+        flush_logs()
 
 
 if __name__ == "__main__":
@@ -6,23 +6,66 @@ Contém a classe de log.
 Autor: Rogers Reiche de Mendonça <rogers.rj@gmail.com>
 Data: Outubro/2021
 """
+import atexit
 from datetime import datetime
+import sys
+import time
+
+# Arquivos de log abertos (caminho -> arquivo), mantidos abertos para nao reabri-los a cada mensagem
+_log_files = {}
+
+# Timestamp das mensagens de log, formatado no maximo uma vez por segundo
+_timestamp_second = None
+_timestamp = ''
 
 
 def now(fmt_time: str = '%d/%m/%Y %H:%M:%S'):
     return datetime.now().strftime(fmt_time)
 
 
-def log(message: str, end: str = '\n', log_file: str = None, with_timestamp: bool = True):
-    log_message = f"[{now()}] {message}" if with_timestamp else message
-    print(log_message, end)
+def _now_timestamp():
+    global _timestamp_second, _timestamp
+    second = int(time.time())
+    if second != _timestamp_second:
+        _timestamp_second = second
+        _timestamp = now()
+    return _timestamp
+
+
+def _get_log_file(log_file: str):
+    f = _log_files.get(log_file)
+    if f is None:
+        f = _log_files[log_file] = open(log_file, 'a', buffering=1 << 16)
+    return f
+
+
+def flush_logs():
+    for f in _log_files.values():
+        f.flush()
+
+
+def close_logs():
+    for f in _log_files.values():
+        f.close()
+    _log_files.clear()
+
+
+atexit.register(close_logs)
+
+
+def log_raw(message: str, end: str = '\n', log_file: str = None):
+    log_message = message + end
+    sys.stdout.write(log_message)
 
     if bool(log_file and log_file.strip()):
         try:
-            with open(log_file, 'a') as f:
-                f.write(log_message + end)
+            _get_log_file(log_file).write(log_message)
         except Exception as ex:
             log_error = f"{log_file}.{now('%Y.%m.%d.%H.%M.%S.%f')}.err"
             with open(log_error, 'a') as f_err:
                 f_err.write(ex.__str__() + end)
-                f_err.write(log_message + end)
+                f_err.write(log_message)
+
+
+def log(message: str, end: str = '\n', log_file: str = None, with_timestamp: bool = True):
+    log_raw(f"[{_now_timestamp()}] {message}" if with_timestamp else message, end=end, log_file=log_file)